@@ -6,11 +6,17 @@ Author: Kenza Bouqdir
 """
 
 import os
-import pickle
+import json
 import base64
 import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from dateutil.tz import tzlocal
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Charts are only saved to files
 import matplotlib.pyplot as plt
 import seaborn as sns
 from google.auth.transport.requests import Request
@@ -18,6 +24,12 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
+# google-re2 matches alternations in linear time; fall back to re when missing
+try:
+    import re2
+except ImportError:
+    re2 = re
+
 # Set style for professional-looking charts
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 6)
@@ -25,17 +37,86 @@ plt.rcParams['font.size'] = 10
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+# Chart resolution; PNGs are saved with light compression since they are previews
+CHART_DPI = 150
+
+# Descriptions of the charts listed at the end of a run
+CHART_DESCRIPTIONS = {
+    'status_distribution.png': "📊 status_distribution.png - Status pie chart",
+    'timeline.png': "📈 timeline.png - Applications over time",
+    'top_companies.png': "🏢 top_companies.png - Top companies bar chart",
+    'monthly_heatmap.png': "🔥 monthly_heatmap.png - Status by month heatmap",
+}
+
+# Parsed emails are cached here, keyed by Gmail message id (messages never change)
+CACHE_DB = 'email_cache.db'
+
+# Job boards excluded server-side so their alerts never come back from search
+EXCLUDED_SENDERS = [
+    'linkedin.com', 'indeed.com', 'glassdoor.com', 'monster.com',
+    'jobrapido.com', 'jooble.org', 'talent.com', 'simplyhired.com',
+    'ziprecruiter.com'
+]
+EXCLUDE = ' '.join(f'-from:{domain}' for domain in EXCLUDED_SENDERS)
+
+# Precompiled patterns used for every email
+_RE_COMPANY_DOMAIN = re.compile(r'@([a-z0-9-]+)\.(?:com|io|ai|co)\b', re.ASCII)
+_RE_COMPANY_SUBJECT = re.compile(r'at\s+([\w\s]+?)(?:\s*[-–|]|$)')
+_RE_ROLE_1 = re.compile(r'(?:for\s+|role:\s*|position:\s*)([\w\s]{5,40}?)(?:\s+at|\s*[-–|]|$)', re.IGNORECASE)
+_RE_ROLE_2 = re.compile(r'(software engineer|data engineer|ml engineer|machine learning|data scientist|backend|frontend|full.stack)', re.IGNORECASE | re.ASCII)
+
+# Keywords that mark job alerts and newsletters
+SPAM_INDICATORS = [
+    'linkedin.com', 'indeed.com', 'glassdoor.com', 'monster.com',
+    'jobrapido', 'jooble', 'jobtome', 'talent.com', 'simplyhired',
+    'ziprecruiter', 'newsletter', 'job alert', 'new jobs',
+    'recommended for you', 'jobs matching', 'daily digest'
+]
+
+# Status keywords, highest priority first
+STATUS_KEYWORDS = {
+    'Rejected': ['not selected', 'unfortunately', 'other candidates',
+                 'position filled', 'not moving forward', 'pursue other',
+                 'not be considered'],
+    'Assessment': ['codesignal', 'hackerrank', 'coding challenge',
+                   'assessment', 'technical test'],
+    'Interview': ['interview', 'schedule', 'meet with', 'phone screen',
+                  'video call', 'would like to speak'],
+    'Applied': ['application received', 'thank you for applying',
+                'confirm your application', 'submitted successfully'],
+}
+
+# One alternation regex per status, so a whole column is scanned at once
+_STATUS_PATTERNS = {status: '|'.join(map(re.escape, kws)) for status, kws in STATUS_KEYWORDS.items()}
+_RE_SPAM = re2.compile('|'.join(map(re.escape, SPAM_INDICATORS)))
+
+# Recruiting platforms stripped from sender domains
+RECRUITING_PLATFORMS = ['greenhouse', 'lever', 'workday', 'myworkday']
+
+# Only the start of a body is classified (500 characters), so only this many
+# base64 characters are decoded: 2000 chars -> 1500 bytes, enough for 500
+# characters of up to 3-byte UTF-8. Must stay a multiple of 4.
+BODY_B64_CHARS = 2000
+
+def decode_body(data):
+    """Decode a base64url email body, ignoring malformed data"""
+    try:
+        return base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
+    except Exception:
+        return ''
+
 class JobApplicationTracker:
     def __init__(self):
         self.service = None
-        self.applications = []
+        self.applications = pd.DataFrame()
+        self.chart_files = []
         
     def authenticate(self):
         """Authenticate with Gmail API"""
         creds = None
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                creds = pickle.load(token)
+        if os.path.exists('token.json'):
+            with open('token.json') as token:
+                creds = Credentials.from_authorized_user_info(json.load(token), SCOPES)
         
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
@@ -43,105 +124,183 @@ class JobApplicationTracker:
             else:
                 flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
                 creds = flow.run_local_server(port=0)
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
+            with open('token.json', 'w') as token:
+                token.write(creds.to_json())
         
         self.service = build('gmail', 'v1', credentials=creds)
         print("✅ Successfully authenticated with Gmail\n")
     
-    def search_emails(self, query, max_results=200):
-        """Search Gmail for emails matching query"""
+    def search_emails(self, query, page_size=500):
+        """Search Gmail for emails matching query (follows all result pages)"""
+        messages = []
+        page_token = None
         try:
-            results = self.service.users().messages().list(
-                userId='me', q=query, maxResults=max_results
-            ).execute()
-            return results.get('messages', [])
+            while True:
+                results = self.service.users().messages().list(
+                    userId='me', q=query, maxResults=page_size, pageToken=page_token
+                ).execute()
+                messages.extend(results.get('messages', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    return messages
         except Exception as e:
             print(f"❌ Error: {e}")
-            return []
+            return messages
     
-    def get_email_details(self, msg_id):
-        """Get full email details"""
+    def iter_email_batches(self, msg_ids, fmt='full', metadata_headers=None, batch_size=100):
+        """Fetch email details in batches (Gmail allows up to 100 per batch), yielding each batch"""
+        extra = {'metadataHeaders': metadata_headers} if metadata_headers else {}
+        
+        def callback(request_id, response, exception):
+            if exception is None and response:
+                responses.append((request_id, response))
+        
+        msg_ids = list(msg_ids)
+        failed = 0
+        for start in range(0, len(msg_ids), batch_size):
+            chunk = msg_ids[start:start + batch_size]
+            responses = []
+            batch = self.service.new_batch_http_request(callback=callback)
+            for msg_id in chunk:
+                batch.add(
+                    self.service.users().messages().get(userId='me', id=msg_id, format=fmt, **extra),
+                    request_id=msg_id
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                print(f"❌ Error: {e}")
+            # Per-message errors (e.g. 429 rateLimitExceeded) leave those emails out
+            failed += len(chunk) - len(responses)
+            progress = f"  Fetched {start + len(chunk)}/{len(msg_ids)}..."
+            if failed:
+                progress += f" ({failed} failed)"
+            print(progress)
+            yield responses
+    
+    def load_cache(self, msg_ids, chunk_size=500):
+        """Load already parsed emails and known skipped ids from the local cache"""
+        msg_ids = list(msg_ids)
+        records = {}
+        skipped = set()
+        conn = sqlite3.connect(CACHE_DB)
         try:
-            return self.service.users().messages().get(
-                userId='me', id=msg_id, format='full'
-            ).execute()
-        except:
-            return None
+            conn.execute('CREATE TABLE IF NOT EXISTS emails (id TEXT PRIMARY KEY, payload TEXT)')
+            for start in range(0, len(msg_ids), chunk_size):
+                chunk = msg_ids[start:start + chunk_size]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = conn.execute(f'SELECT id, payload FROM emails WHERE id IN ({placeholders})', chunk)
+                for msg_id, payload in rows:
+                    # Job alerts are stored without a payload
+                    if payload is None:
+                        skipped.add(msg_id)
+                        continue
+                    record = json.loads(payload)
+                    record['Date'] = datetime.fromisoformat(record['Date'])
+                    records[msg_id] = record
+        finally:
+            conn.close()
+        return records, skipped
     
-    def is_job_alert(self, email_from, subject):
-        """Filter out job alerts and newsletters"""
-        spam_indicators = [
-            'linkedin.com', 'indeed.com', 'glassdoor.com', 'monster.com',
-            'jobrapido', 'jooble', 'jobtome', 'talent.com', 'simplyhired',
-            'ziprecruiter', 'newsletter', 'job alert', 'new jobs',
-            'recommended for you', 'jobs matching', 'daily digest'
+    def save_cache(self, df, skipped_ids=()):
+        """Store parsed emails (df is indexed by message id) and skipped ids in the local cache"""
+        rows = [
+            (msg_id, json.dumps({**record, 'Date': record['Date'].isoformat()}))
+            for msg_id, record in df.to_dict('index').items()
         ]
+        rows.extend((msg_id, None) for msg_id in skipped_ids)
+        conn = sqlite3.connect(CACHE_DB)
+        try:
+            with conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS emails (id TEXT PRIMARY KEY, payload TEXT)')
+                conn.executemany('INSERT OR REPLACE INTO emails (id, payload) VALUES (?, ?)', rows)
+        finally:
+            conn.close()
+    
+    def is_job_alert(self, email_from, subject):
+        """Filter out job alerts and newsletters (also catches subject-based alerts)"""
         combined = (email_from + " " + subject).lower()
-        return any(indicator in combined for indicator in spam_indicators)
+        return _RE_SPAM.search(combined) is not None
     
-    def extract_company(self, email_from, subject):
-        """Extract company name from email"""
-        # Try email domain
-        match = re.search(r'@([\w-]+)\.(com|io|ai|co)', email_from.lower())
-        if match:
-            company = match.group(1)
-            # Remove common recruiting platforms
-            company = company.replace('greenhouse', '').replace('lever', '').replace('workday', '').replace('myworkday', '')
-            if company and len(company) > 2:
-                return company.title()
-        
-        # Try subject line
-        match = re.search(r'at\s+([\w\s]+?)(?:\s*[-–|]|$)', subject)
-        if match:
-            return match.group(1).strip().title()
-        
-        return "Unknown"
+    def classify_emails(self, raw_df):
+        """Extract company, role and status for all emails at once"""
+        if raw_df.empty:
+            return pd.DataFrame(columns=['Date', 'Company', 'Role', 'Status', 'Subject'])
+        
+        subjects = raw_df['Subject']
+        
+        # Lowercase and slice each field once; every classifier reuses these
+        s_lower = subjects.str.lower()
+        b_lower = raw_df['Body'].str.slice(0, 500).str.lower()
+        combined = s_lower + ' ' + b_lower
+        
+        # Company: sender domain first, then "at <Company>" in the subject
+        company = raw_df['From'].str.lower().str.extract(_RE_COMPANY_DOMAIN)[0]
+        for platform in RECRUITING_PLATFORMS:
+            company = company.str.replace(platform, '', regex=False)
+        company = company.where(company.str.len() > 2)
+        company = company.str.title().fillna(
+            subjects.str.extract(_RE_COMPANY_SUBJECT)[0].str.strip().str.title()
+        ).fillna('Unknown')
+        
+        # Role: each pattern is tried on the subject, then the start of the body
+        # (title-casing makes the result independent of the input case)
+        body_start = b_lower.str.slice(0, 200)
+        role = pd.Series(pd.NA, index=raw_df.index, dtype=object)
+        for pattern in (_RE_ROLE_1, _RE_ROLE_2):
+            role = role.fillna(s_lower.str.extract(pattern)[0])
+            role = role.fillna(body_start.str.extract(pattern)[0])
+        role = role.str.strip().str.title().fillna('Unknown')
+        
+        # Status: highest priority first, only scanning emails not yet classified
+        status = pd.Series('Other', index=raw_df.index)
+        pending = combined
+        for name, pattern in _STATUS_PATTERNS.items():
+            if pending.empty:
+                break
+            matched = pending.str.contains(pattern, regex=True, na=False)
+            status.loc[matched.index[matched]] = name
+            pending = pending[~matched]
+        
+        return pd.DataFrame({
+            'Date': raw_df['Date'],
+            'Company': company,
+            'Role': role,
+            'Status': status,
+            'Subject': subjects
+        })
     
-    def categorize_status(self, subject, body):
-        """Categorize email status"""
-        s = subject.lower()
-        b = (body[:500] if body else "").lower()
-        combined = s + " " + b
-        
-        # Define keywords
-        rejection_kw = ['not selected', 'unfortunately', 'other candidates', 
-                       'position filled', 'not moving forward', 'pursue other',
-                       'not be considered']
-        assessment_kw = ['codesignal', 'hackerrank', 'coding challenge', 
-                        'assessment', 'technical test']
-        interview_kw = ['interview', 'schedule', 'meet with', 'phone screen',
-                       'video call', 'would like to speak']
-        applied_kw = ['application received', 'thank you for applying',
-                     'confirm your application', 'submitted successfully']
-        
-        # Categorize
-        if any(kw in combined for kw in rejection_kw):
-            return 'Rejected'
-        elif any(kw in combined for kw in assessment_kw):
-            return 'Assessment'
-        elif any(kw in combined for kw in interview_kw):
-            return 'Interview'
-        elif any(kw in combined for kw in applied_kw):
-            return 'Applied'
-        return 'Other'
+    def find_body_data(self, payload):
+        """Return the start of the plain-text body's base64 data, or an empty string"""
+        if 'parts' not in payload:
+            return payload.get('body', {}).get('data', '')[:BODY_B64_CHARS]
+        
+        part = next((p for p in payload['parts']
+                     if p.get('mimeType') == 'text/plain' and 'data' in p.get('body', {})), None)
+        if part:
+            return part['body']['data'][:BODY_B64_CHARS]
+        
+        # Only descend into nested multiparts when there is no top-level text part
+        for p in payload['parts']:
+            if 'parts' in p:
+                data = self.find_body_data(p)
+                if data:
+                    return data
+        return ''
     
-    def extract_role(self, subject, body):
-        """Extract job role from email"""
-        patterns = [
-            r'(?:for\s+|role:\s*|position:\s*)([\w\s]{5,40}?)(?:\s+at|\s*[-–|]|$)',
-            r'(software engineer|data engineer|ml engineer|machine learning|data scientist|backend|frontend|full.stack)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, subject, re.IGNORECASE)
-            if match:
-                return match.group(1).strip().title()
-            if body:
-                match = re.search(pattern, body[:200], re.IGNORECASE)
-                if match:
-                    return match.group(1).strip().title()
-        return "Unknown"
+    def parse_batch(self, batch):
+        """Extract ids, timestamps (ms) and plain-text bodies for a batch of full emails"""
+        msg_ids = []
+        dates_ms = []
+        b64_data = []
+        for msg_id, email in batch:
+            msg_ids.append(msg_id)
+            dates_ms.append(int(email['internalDate']))
+            b64_data.append(self.find_body_data(email['payload']))
+        
+        # Decode all bodies of the batch in one pass
+        bodies = [decode_body(data) for data in b64_data]
+        return msg_ids, dates_ms, bodies
     
     def analyze_applications(self, months=6):
         """Analyze job applications from Gmail"""
@@ -150,84 +309,130 @@ class JobApplicationTracker:
         # Date filter
         cutoff_date = (datetime.now() - timedelta(days=30*months)).strftime('%Y/%m/%d')
         
-        # Search queries
-        queries = [
-            f'after:{cutoff_date} ("application received" OR "thank you for applying")',
-            f'after:{cutoff_date} ("not selected" OR "unfortunately" OR "other candidates")',
-            f'after:{cutoff_date} (interview OR "schedule a call" OR assessment)',
-            f'after:{cutoff_date} (codesignal OR hackerrank)',
+        # Search terms, combined into a single query
+        terms = [
+            '("application received" OR "thank you for applying")',
+            '("not selected" OR "unfortunately" OR "other candidates")',
+            '(interview OR "schedule a call" OR assessment)',
+            '(codesignal OR hackerrank)',
         ]
+        query = f'after:{cutoff_date} ({" OR ".join(terms)}) {EXCLUDE}'
         
         # Collect email IDs
-        all_ids = set()
-        for query in queries:
-            msgs = self.search_emails(query)
-            print(f"  Found {len(msgs)} emails")
-            all_ids.update(msg['id'] for msg in msgs)
+        all_ids = {msg['id'] for msg in self.search_emails(query)}
         
         print(f"\n📧 Total emails found: {len(all_ids)}")
-        print("📥 Processing emails...\n")
         
-        # Process each email
-        for idx, msg_id in enumerate(all_ids, 1):
-            if idx % 10 == 0:
-                print(f"  Processed {idx}/{len(all_ids)}...")
-            
-            email = self.get_email_details(msg_id)
-            if not email:
-                continue
-            
-            # Extract headers
-            headers = {h['name']: h['value'] for h in email['payload']['headers']}
+        # Skip emails parsed or filtered out on a previous run
+        cached, skipped = self.load_cache(all_ids)
+        new_ids = all_ids - cached.keys() - skipped
+        print(f"💾 Loaded {len(cached)} emails from cache ({len(skipped)} job alerts skipped)")
+        print("📥 Processing new emails...\n")
+        
+        # First pass: headers only, to drop job alerts before downloading bodies
+        batches = self.iter_email_batches(
+            new_ids, fmt='metadata',
+            metadata_headers=['From', 'Subject', 'Date', 'Message-ID']
+        )
+        kept = {}
+        alert_ids = []
+        for msg_id, email in (item for batch in batches for item in batch):
+            headers = {h['name']: h['value'] for h in email['payload'].get('headers', [])}
             subject = headers.get('Subject', '')
             email_from = headers.get('From', '')
             
             # Skip job alerts
             if self.is_job_alert(email_from, subject):
+                alert_ids.append(msg_id)
                 continue
-            
-            # Extract body
-            body = ""
-            try:
-                if 'parts' in email['payload']:
-                    for part in email['payload']['parts']:
-                        if part['mimeType'] == 'text/plain' and 'data' in part['body']:
-                            body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8', errors='ignore')
-                            break
-                elif 'body' in email['payload'] and 'data' in email['payload']['body']:
-                    body = base64.urlsafe_b64decode(email['payload']['body']['data']).decode('utf-8', errors='ignore')
-            except:
-                pass
-            
-            # Extract date
-            date_ms = email['internalDate']
-            date = datetime.fromtimestamp(int(date_ms)/1000)
-            
-            # Store application data
-            self.applications.append({
-                'Date': date,
-                'Company': self.extract_company(email_from, subject),
-                'Role': self.extract_role(subject, body),
-                'Status': self.categorize_status(subject, body),
-                'Subject': subject
-            })
+            kept[msg_id] = (subject, email_from)
+        
+        print(f"\n📥 Downloading {len(kept)} emails after filtering job alerts...\n")
+        
+        # Second pass: full content only for the emails we keep. Each batch is
+        # parsed on the thread pool while the next one is being downloaded.
+        # Columns are preallocated once and filled by position
+        n = len(kept)
+        raw_ids = np.empty(n, dtype=object)
+        raw_dates_ms = np.empty(n, dtype='int64')
+        raw_froms = np.empty(n, dtype=object)
+        raw_subjects = np.empty(n, dtype=object)
+        raw_bodies = np.empty(n, dtype=object)
+        pos = 0
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            futures = [
+                pool.submit(self.parse_batch, batch)
+                for batch in self.iter_email_batches(kept)
+            ]
+            for future in as_completed(futures):
+                msg_ids, dates_ms, bodies = future.result()
+                end = pos + len(msg_ids)
+                raw_ids[pos:end] = msg_ids
+                raw_dates_ms[pos:end] = dates_ms
+                raw_subjects[pos:end] = [kept[msg_id][0] for msg_id in msg_ids]
+                raw_froms[pos:end] = [kept[msg_id][1] for msg_id in msg_ids]
+                raw_bodies[pos:end] = bodies
+                pos = end
+        
+        # Convert all timestamps at once: Gmail gives UTC milliseconds, shown in local time
+        # (failed fetches leave unused slots at the end, so trim to pos)
+        dates = (pd.DatetimeIndex(raw_dates_ms[:pos].view('datetime64[ms]'))
+                 .tz_localize('UTC').tz_convert(tzlocal()).tz_localize(None))
+        
+        # Classify all new emails in one go and cache the results
+        raw_df = pd.DataFrame({
+            'Date': dates.to_numpy(),
+            'From': raw_froms[:pos],
+            'Subject': raw_subjects[:pos],
+            'Body': raw_bodies[:pos]
+        }, index=raw_ids[:pos], copy=False)
+        new_df = self.classify_emails(raw_df)
+        self.save_cache(new_df, alert_ids)
+        
+        cached_df = pd.DataFrame.from_dict(cached, orient='index', columns=new_df.columns)
+        frames = [df for df in (cached_df, new_df) if not df.empty]
+        self.applications = pd.concat(frames) if frames else new_df
         
         print(f"\n✅ Found {len(self.applications)} actual applications\n")
     
-    def generate_visualizations(self, df):
+    def reset_figure(self, fig, size):
+        """Clear the shared figure and return a fresh axes of the given size"""
+        fig.clf()
+        fig.set_size_inches(*size)
+        return fig.add_subplot()
+    
+    def save_chart(self, fig, filename):
+        """Save the current chart to the output directory"""
+        fig.tight_layout()
+        fig.savefig(f'output/{filename}', dpi=CHART_DPI, bbox_inches='tight',
+                    metadata={'Software': None}, pil_kwargs={'compress_level': 1})
+        print(f"  ✓ Saved: {filename}")
+        self.chart_files.append(filename)
+    
+    def generate_visualizations(self, df, status_counts=None, company_counts=None):
         """Generate charts and save as PNG files"""
         if df.empty:
             print("⚠️ No data to visualize")
             return
         
+        self.chart_files = []
+        
+        # Reuse counts from the report when given
+        if status_counts is None:
+            status_counts = df['Status'].value_counts()
+        if company_counts is None:
+            company_counts = df['Company'].value_counts()
+        
         print("📊 Generating visualizations...\n")
         
         # Create output directory
         os.makedirs('output', exist_ok=True)
         
+        # One figure is reused for all charts
+        fig = plt.figure()
+        
         # 1. Status Distribution Pie Chart
-        fig, ax = plt.subplots(figsize=(10, 8))
-        status_counts = df['Status'].value_counts()
+        ax = self.reset_figure(fig, (10, 8))
         colors = sns.color_palette('Set2', len(status_counts))
         
         wedges, texts, autotexts = ax.pie(
@@ -244,13 +449,10 @@ class JobApplicationTracker:
             autotext.set_weight('bold')
         
         ax.set_title('Application Status Distribution', fontsize=16, weight='bold', pad=20)
-        plt.tight_layout()
-        plt.savefig('output/status_distribution.png', dpi=300, bbox_inches='tight')
-        print("  ✓ Saved: status_distribution.png")
-        plt.close()
+        self.save_chart(fig, 'status_distribution.png')
         
         # 2. Applications Over Time
-        fig, ax = plt.subplots(figsize=(14, 6))
+        ax = self.reset_figure(fig, (14, 6))
         df_sorted = df.sort_values('Date')
         df_sorted['Week'] = df_sorted['Date'].dt.to_period('W')
         weekly_apps = df_sorted.groupby('Week').size()
@@ -263,14 +465,11 @@ class JobApplicationTracker:
         ax.set_xticks(x[::2])  # Show every other week
         ax.set_xticklabels([str(w) for w in weekly_apps.index[::2]], rotation=45)
         ax.grid(axis='y', alpha=0.3)
-        plt.tight_layout()
-        plt.savefig('output/timeline.png', dpi=300, bbox_inches='tight')
-        print("  ✓ Saved: timeline.png")
-        plt.close()
+        self.save_chart(fig, 'timeline.png')
         
         # 3. Top Companies Bar Chart
-        fig, ax = plt.subplots(figsize=(12, 8))
-        company_counts = df['Company'].value_counts().head(10)
+        ax = self.reset_figure(fig, (12, 8))
+        company_counts = company_counts.head(10)
         
         y_pos = range(len(company_counts))
         ax.barh(y_pos, company_counts.values, color='#2ecc71', edgecolor='black')
@@ -284,36 +483,37 @@ class JobApplicationTracker:
         for i, v in enumerate(company_counts.values):
             ax.text(v + 0.1, i, str(v), va='center', fontweight='bold')
         
-        plt.tight_layout()
-        plt.savefig('output/top_companies.png', dpi=300, bbox_inches='tight')
-        print("  ✓ Saved: top_companies.png")
-        plt.close()
+        self.save_chart(fig, 'top_companies.png')
         
-        # 4. Status by Month Heatmap
-        fig, ax = plt.subplots(figsize=(14, 6))
+        # 4. Status by Month Heatmap (only meaningful with at least two months)
         df['Month'] = df['Date'].dt.to_period('M')
-        monthly_status = pd.crosstab(df['Month'], df['Status'])
-        
-        sns.heatmap(monthly_status.T, annot=True, fmt='d', cmap='YlGnBu',
-                   cbar_kws={'label': 'Count'}, ax=ax, linewidths=0.5)
-        ax.set_title('Application Status by Month', fontsize=16, weight='bold', pad=20)
-        ax.set_xlabel('Month', fontsize=12, weight='bold')
-        ax.set_ylabel('Status', fontsize=12, weight='bold')
-        plt.tight_layout()
-        plt.savefig('output/monthly_heatmap.png', dpi=300, bbox_inches='tight')
-        print("  ✓ Saved: monthly_heatmap.png")
-        plt.close()
+        if df['Month'].nunique() >= 2:
+            ax = self.reset_figure(fig, (14, 6))
+            monthly_status = pd.crosstab(df['Month'], df['Status'])
+            
+            sns.heatmap(monthly_status.T, annot=True, fmt='d', cmap='YlGnBu',
+                       cbar_kws={'label': 'Count'}, ax=ax, linewidths=0.5)
+            ax.set_title('Application Status by Month', fontsize=16, weight='bold', pad=20)
+            ax.set_xlabel('Month', fontsize=12, weight='bold')
+            ax.set_ylabel('Status', fontsize=12, weight='bold')
+            self.save_chart(fig, 'monthly_heatmap.png')
+        else:
+            print("  – Skipped: monthly_heatmap.png (less than two months of data)")
+        plt.close(fig)
         
         print("\n✅ All visualizations saved to 'output/' directory\n")
     
     def generate_report(self):
-        """Generate text report and CSV"""
-        if not self.applications:
+        """Generate text report, CSV and visualizations"""
+        if self.applications.empty:
             print("❌ No applications found\n")
             return None
         
-        df = pd.DataFrame(self.applications)
-        df = df.sort_values('Date', ascending=False)
+        df = self.applications.sort_values('Date', ascending=False)
+        
+        # Counts shared by the report and the charts
+        status_counts = df['Status'].value_counts()
+        company_counts = df['Company'].value_counts()
         
         # Save CSV
         filename = f'output/applications_{datetime.now().strftime("%Y%m%d")}.csv'
@@ -328,12 +528,12 @@ class JobApplicationTracker:
         print(f"📧 Total Applications: {len(df)}")
         
         print("\n🏢 STATUS BREAKDOWN:")
-        for status, count in df['Status'].value_counts().items():
+        for status, count in status_counts.items():
             pct = (count / len(df)) * 100
             print(f"   {status:15s}: {count:3d} ({pct:5.1f}%)")
         
         print("\n🏆 TOP COMPANIES:")
-        for company, count in df['Company'].value_counts().head(10).items():
+        for company, count in company_counts.head(10).items():
             print(f"   {company:30s}: {count:2d}")
         
         print("\n💼 TOP ROLES:")
@@ -341,9 +541,9 @@ class JobApplicationTracker:
             print(f"   {role:40s}: {count:2d}")
         
         # Conversion metrics
-        applied = df[df['Status'] == 'Applied'].shape[0]
-        rejected = df[df['Status'] == 'Rejected'].shape[0]
-        interview = df[df['Status'].isin(['Interview', 'Assessment'])].shape[0]
+        applied = status_counts.get('Applied', 0)
+        rejected = status_counts.get('Rejected', 0)
+        interview = status_counts.get('Interview', 0) + status_counts.get('Assessment', 0)
         
         if applied > 0:
             print(f"\n📊 KEY METRICS:")
@@ -358,6 +558,8 @@ class JobApplicationTracker:
         print("📊 Visualizations saved to: output/ directory")
         print("=" * 70 + "\n")
         
+        self.generate_visualizations(df, status_counts, company_counts)
+        
         return df
 
 def main():
@@ -377,15 +579,11 @@ def main():
         # Generate report and visualizations
         df = tracker.generate_report()
         if df is not None and not df.empty:
-            tracker.generate_visualizations(df)
-            
             print("✅ Analysis complete!")
             print("\nFiles generated:")
             print("  📄 applications_YYYYMMDD.csv - Raw data")
-            print("  📊 status_distribution.png - Status pie chart")
-            print("  📈 timeline.png - Applications over time")
-            print("  🏢 top_companies.png - Top companies bar chart")
-            print("  🔥 monthly_heatmap.png - Status by month heatmap")
+            for filename in tracker.chart_files:
+                print(f"  {CHART_DESCRIPTIONS[filename]}")
             print("\n💡 Tip: Include these visualizations in your job search tracker!")
         
     except Exception as e: